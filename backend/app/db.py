@@ -1,24 +1,185 @@
 """Database setup and connection management."""
+import atexit
 import sqlite3
+import threading
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 DATABASE_PATH = Path("reviews.db")
 
+# Bump whenever init_db() changes so existing databases are migrated
+SCHEMA_VERSION = 3
+
+# Prepared statements kept per connection (sqlite3 default is 128)
+CACHED_STATEMENTS = 256
+
+# Cached LLM responses older than this are pruned
+LLM_CACHE_TTL_DAYS = 30
+SQL_PRUNE_LLM_CACHE = "DELETE FROM llm_cache WHERE created_at < datetime('now', ?)"
+
+# Cap on bound parameters per multi-row INSERT (SQLite's default limit since
+# 3.32); builds with a lower compiled limit are respected via getlimit()
+MAX_BULK_PARAMS = 32766
+
+# WAL lets readers run alongside the writer. journal_mode is stored in the
+# database file, so it only needs to be set once per process.
+_wal_enabled = False
+
+# Per-connection tuning: NORMAL sync skips the per-commit fsync that WAL
+# makes unnecessary, and the cache/mmap sizes keep hot pages in memory.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256MB
+    "PRAGMA cache_size=-65536",  # 64MB (negative values are KiB)
+)
+
+
+def _apply_pragmas(conn: sqlite3.Connection):
+    """Apply PRAGMA settings to a new connection."""
+    global _wal_enabled
+    if not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+
+# One long-lived connection per thread, reused across requests
+_pool = threading.local()
+_pool_lock = threading.Lock()
+_pool_connections: List[sqlite3.Connection] = []
+# Bumped by close_all() so threads drop connections it has closed
+_pool_generation = 0
+
 
 def get_db() -> sqlite3.Connection:
-    """Get database connection."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    conn.row_factory = sqlite3.Row
+    """Get this thread's pooled database connection.
+
+    Connections are shared, so callers must commit their work and must not
+    close the connection.
+    """
+    conn = getattr(_pool, "conn", None)
+    if conn is None or _pool.generation != _pool_generation:
+        # check_same_thread=False only so the exit hook can close it
+        conn = sqlite3.connect(
+            str(DATABASE_PATH),
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn)
+        with _pool_lock:
+            _pool.conn = conn
+            _pool.generation = _pool_generation
+            _pool_connections.append(conn)
     return conn
 
 
+@atexit.register
+def close_all():
+    """Close every pooled connection.
+
+    Called on application shutdown and again at interpreter exit. Any
+    thread that uses the database afterwards gets a new connection.
+    """
+    global _pool_generation
+    with _pool_lock:
+        _pool_generation += 1
+        while _pool_connections:
+            _pool_connections.pop().close()
+
+
+@lru_cache(maxsize=32)
+def _bulk_insert_sql(table: str, columns: Tuple[str, ...], row_count: int) -> str:
+    """Build an INSERT with row_count parameterized VALUES tuples."""
+    placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        + ", ".join([placeholders] * row_count)
+    )
+
+
+def bulk_insert(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Tuple[str, ...],
+    rows: Iterable[Sequence]
+) -> int:
+    """Insert rows using multi-row VALUES statements.
+
+    Each statement carries up to the largest power-of-two row count that
+    fits the parameter limit, so 10k reviews take a handful of statements
+    instead of 10k executions. A shorter final batch is split into
+    power-of-two pieces, which keeps the set of distinct SQL texts (and so
+    the connection's cached prepared statements) to a few per table. The
+    caller owns the transaction.
+
+    Returns:
+        Number of rows inserted
+    """
+    max_params = min(MAX_BULK_PARAMS, conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER))
+    max_rows = max(1, max_params // len(columns))
+    rows_per_statement = 1 << (max_rows.bit_length() - 1)
+    rows = iter(rows)
+    inserted = 0
+    while batch := list(islice(rows, rows_per_statement)):
+        offset = 0
+        while offset < len(batch):
+            size = 1 << ((len(batch) - offset).bit_length() - 1)
+            conn.execute(
+                _bulk_insert_sql(table, columns, size),
+                [value for row in batch[offset:offset + size] for value in row]
+            )
+            offset += size
+        inserted += len(batch)
+    return inserted
+
+
+def prune_llm_cache(conn: sqlite3.Connection) -> int:
+    """Delete llm_cache entries older than LLM_CACHE_TTL_DAYS.
+
+    The caller owns the transaction.
+
+    Returns:
+        Number of entries deleted
+    """
+    return conn.execute(SQL_PRUNE_LLM_CACHE, (f"-{LLM_CACHE_TTL_DAYS} days",)).rowcount
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Read the schema version stored in PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
 def init_db():
-    """Initialize database tables."""
+    """Initialize or migrate database tables.
+
+    Does nothing when the database is already at SCHEMA_VERSION, so only the
+    first boot against a database runs any DDL.
+    """
     conn = get_db()
-    cursor = conn.cursor()
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return
 
+    # Several workers may boot at once: take the write lock before migrating
+    # and re-check the version, so only one of them runs the DDL
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if get_schema_version(conn) < SCHEMA_VERSION:
+            _create_schema(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _create_schema(cursor: sqlite3.Cursor):
+    """Create missing tables and indexes, and add missing columns."""
     # Jobs table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS jobs (
@@ -26,16 +187,15 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             status TEXT DEFAULT 'pending',
-            total_reviews INTEGER DEFAULT 0
+            total_reviews INTEGER DEFAULT 0,
+            filename TEXT
         )
     """)
-    
-    # Add filename column if it doesn't exist (for existing databases)
-    try:
+
+    # Migrate databases created before jobs had a filename column
+    job_columns = {row["name"] for row in cursor.execute("PRAGMA table_info(jobs)")}
+    if "filename" not in job_columns:
         cursor.execute("ALTER TABLE jobs ADD COLUMN filename TEXT")
-    except sqlite3.OperationalError:
-        # Column already exists, ignore
-        pass
 
     # Reviews table
     cursor.execute("""
@@ -54,6 +214,10 @@ def init_db():
         )
     """)
 
+    # Reviews are always looked up by job; job_results and jobs are already
+    # keyed by the job id through their primary keys
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_job_id ON reviews(job_id)")
+
     # Job results table (stores analysis JSON)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS job_results (
@@ -65,8 +229,18 @@ def init_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
+    # LLM response cache (exact match on model + messages + temperature)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            prompt_hash TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            model TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Lets prune_llm_cache() range-delete expired entries
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache(created_at)")
 
 
 if __name__ == "__main__":
@@ -1,127 +1,270 @@
 """LLM integration for theme extraction and brief generation."""
-import json
+import asyncio
+import hashlib
+import heapq
+import os
 import re
-from typing import Dict, List, Optional
+import sqlite3
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, TypeVar
 
-from groq import Groq
+import orjson
+from groq import AsyncGroq, RateLimitError
 
-from app.models import ReviewInput, ThemeMention, ThemeSummary, TrendWindow
+from app import db
+from app.models import ReviewRow, ThemeMention, ThemeSummary, TrendWindow
 
+T = TypeVar("T")
 
 # Groq uses very fast LPU (Language Processing Unit) for inference
 GROQ_MODEL = "openai/gpt-oss-120b"  # Fast and high quality
 GROQ_MODEL_Cheap = "llama-3.3-70b-versatile"
+GROQ_MODEL_DRAFT = "llama-3.1-8b-instant"  # First pass for theme extraction
+
+# Escalate a chunk from the draft model when more than this share of its
+# reviews come back without themes
+ESCALATION_MISSING_THEMES_RATIO = 0.3
+
+# Patterns for theme label normalization
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Static instructions live in the system message so every request shares a
+# byte-identical prefix (lets the provider reuse its prompt cache); the user
+# message carries only the JSON payload.
+THEME_EXTRACTION_SYSTEM_PROMPT = """You are a sentiment identification and theme extraction specialist that extracts themes from product reviews. Only Return valid JSON with no markdown or placeholder text.
+
+The user message is a JSON array of product reviews. Analyze these product reviews and extract themes from each.
+
+For each review, identify up to 3 themes. For each theme provide:
+- Label (1-4 words, e.g., "ice retention", "durability")
+- Polarity: "love" (positive sentiment) or "improve" (negative/complaint sentiment)
+- Snippet: exact quote where theme is mentioned (50-150 chars)
+
+Return a JSON array with this structure:
+[
+  {
+    "review_id": "string",
+    "themes": [
+      {
+        "theme_label": "string",
+        "polarity": "love" or "improve",
+        "snippet": "exact quote from review mentioning this theme"
+      }
+    ]
+  }
+]
+
+IMPORTANT: Return ONLY valid JSON. No markdown, no explanations."""
+
+EXECUTIVE_BRIEF_SYSTEM_PROMPT = """You are a business analyst writing executive summaries based on product review data.
+
+The user message is a JSON summary of a product review analysis. Based on it, write a concise executive brief (3-4 paragraphs) that includes:
+
+1. Overall sentiment summary
+2. Top 3 most loved aspects (with context)
+3. Top 3 areas needing improvement (with context)
+4. Recent trends (comparison of the last recent_trends.window_days days vs overall)
+5. Actionable recommendations for:
+   - Product improvements
+   - Content/marketing ideas
+
+Write in a professional, actionable tone. Be specific and data-driven.
+Keep in mind that this will be directly input into a webpage, so ensure regular text formatting and avoid markdown."""
+
+# Leading/trailing markdown code fences around LLM output
+CODE_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+# Chunk packing: reviews are grouped so each request's review payload stays
+# under CHUNK_TOKEN_BUDGET estimated tokens (~4 characters per token)
+CHARS_PER_TOKEN = 4
+CHUNK_TOKEN_BUDGET = 8000
+
+# Reviews per chunk are also sized so the JSON response fits in the output
+# limit. Each review's themes cost a fixed overhead plus quoted snippets that
+# grow with its length (~165 tokens for an 800-char review). Chunks only aim
+# to fill THEME_OUTPUT_TARGET_RATIO of the limit, since the estimate is
+# rough (~23 such reviews per chunk); a response that is still cut off is
+# retried as two smaller chunks.
+THEME_MAX_OUTPUT_TOKENS = 6000
+THEME_OUTPUT_TARGET_RATIO = 0.65
+OUTPUT_TOKENS_PER_REVIEW = 60
+OUTPUT_TOKENS_PER_INPUT_TOKEN = 0.5
+MIN_CHUNK_REVIEWS = 5
+MAX_CHUNK_REVIEWS = 60  # 3900 target tokens / 60 per review at minimum
+CHUNK_SIZE_SAMPLE = 200  # Reviews sampled to estimate the average length
+
+# Retries for rate-limited chunk requests (delay doubles on each attempt)
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF_SECONDS = 1.0
+
+# LLM response cache lookups, shared as prepared statements across calls
+SQL_SELECT_LLM_CACHE = "SELECT response FROM llm_cache WHERE prompt_hash = ?"
+SQL_UPSERT_LLM_CACHE = "INSERT OR REPLACE INTO llm_cache (prompt_hash, response, model) VALUES (?, ?, ?)"
+
+class TruncatedResponseError(ValueError):
+    """An LLM response was cut off at max_tokens and could not be parsed."""
+
 
 # Initialize Groq client
-def get_groq_client() -> Groq:
-    """Get Groq client."""
-    import os
+@lru_cache(maxsize=1)
+def get_groq_client() -> AsyncGroq:
+    """Get the shared Groq client.
+
+    The client is created once and reused so every LLM request shares the
+    same keep-alive HTTP connection pool.
+    """
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise ValueError("GROQ_API_KEY not found in environment variables")
     
-    return Groq(api_key=api_key)
+    return AsyncGroq(api_key=api_key)
+
+
+async def _llm_call_cached(
+    client: AsyncGroq,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    parse: Callable[[str], T]
+) -> T:
+    """Run a chat completion, serving identical requests from the llm_cache table.
+
+    A fresh response is only cached once parse() has accepted it and the
+    model finished normally, so malformed or truncated output is retried
+    on the next request instead of being replayed forever.
+
+    Args:
+        parse: Converts the raw (stripped) message content into the
+            caller's result, raising if it is unusable
+
+    Returns:
+        parse() applied to the message content
+    """
+    prompt_hash = hashlib.sha256(
+        orjson.dumps(
+            {"model": model, "messages": messages, "temperature": temperature},
+            option=orjson.OPT_SORT_KEYS
+        )
+    ).hexdigest()
+
+    conn = db.get_db()
+    cursor = conn.cursor()
+    cursor.execute(SQL_SELECT_LLM_CACHE, (prompt_hash,))
+    row = cursor.fetchone()
+    if row:
+        return parse(row["response"])
+
+    response = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    choice = response.choices[0]
+    content = choice.message.content.strip()
+    try:
+        result = parse(content)
+    except Exception as e:
+        if choice.finish_reason == "length":
+            raise TruncatedResponseError(f"{model} response hit max_tokens={max_tokens}") from e
+        raise
 
+    if choice.finish_reason == "stop":
+        # The completion is already paid for, so a failed cache write (e.g.
+        # "database is locked") must not lose it or leave a transaction open
+        try:
+            conn.execute(SQL_UPSERT_LLM_CACHE, (prompt_hash, content, model))
+            # Expire old entries as new ones arrive so the table stays bounded
+            db.prune_llm_cache(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Failed to cache LLM response ({model}): {e}")
+    return result
 
-def extract_themes_from_chunk(reviews: List[ReviewInput], chunk_id: int) -> List[ThemeMention]:
-    """Extract themes from a chunk of reviews using LLM.
+
+def strip_code_fences(content: str) -> str:
+    """Remove markdown code fences (```json ... ```) wrapped around LLM output."""
+    return CODE_FENCE_PATTERN.sub('', content).strip()
+
+
+async def extract_themes_from_chunk(review_groups: List[List[ReviewRow]], chunk_id: int) -> List[ThemeMention]:
+    """Extract themes from a chunk of duplicate-review groups using LLM.
     
     Args:
-        reviews: List of reviews in this chunk
+        review_groups: Groups from group_duplicate_reviews() in this chunk
         chunk_id: Identifier for this chunk
         
     Returns:
-        List of ThemeMention objects
+        List of ThemeMention objects, one per theme per review in each group
     """
     client = get_groq_client()
     
-    # Prepare review data for LLM - optimized to reduce token usage
+    # Prepare review data for LLM - optimized to reduce token usage.
+    # Each duplicate group is sent once under an id that is unique within
+    # the chunk; its themes are copied to every review in the group after
+    # parsing.
     review_data = []
-    for review in reviews:
+    groups: Dict[str, List[ReviewRow]] = {}
+    for group in review_groups:
+        review = group[0]
         # Limit content to 800 chars - enough for theme extraction, reduces tokens significantly
         content = (review.review_content or "")[:800]
         # Skip very short reviews that likely won't have meaningful themes
         if len(content.strip()) < 20:
             continue
+        sent_id = review.review_id
+        if not sent_id or sent_id in groups:
+            sent_id = f"review_{chunk_id}_{len(review_data)}"
         review_data.append({
-            "id": review.review_id or f"review_{chunk_id}_{len(review_data)}",
+            "id": sent_id,
             "title": (review.review_title or "")[:100],  # Limit title too
             "content": content,
             "rating": review.rating
         })
+        groups[sent_id] = group
     
     if not review_data:
         return []
     
-    # Use compact JSON (no indentation) to reduce token usage
-    reviews_json = json.dumps(review_data, separators=(',', ':'))
-    
-    prompt = f"""Analyze these product reviews and extract themes from each.
-
-For each review, identify up to 3 themes. For each theme provide:
-- Label (1-4 words, e.g., "ice retention", "durability")
-- Polarity: "love" (positive sentiment) or "improve" (negative/complaint sentiment)
-- Snippet: exact quote where theme is mentioned (50-150 chars)
-
-Reviews:
-{reviews_json}
-
-Return a JSON array with this structure:
-[
-  {{
-    "review_id": "string",
-    "themes": [
-      {{
-        "theme_label": "string",
-        "polarity": "love" or "improve",
-        "snippet": "exact quote from review mentioning this theme"
-      }}
-    ]
-  }}
-]
-
-IMPORTANT: Return ONLY valid JSON. No markdown, no explanations."""
+    # orjson emits compact JSON (no indentation) to reduce token usage
+    reviews_json = orjson.dumps(review_data).decode()
     
     try:
-        response = client.chat.completions.create(
-            model=GROQ_MODEL_Cheap,  # Use cheaper model for theme extraction - faster and more cost-effective
-            messages=[
-                {"role": "system", "content": "You are a sentiment identification and theme extraction specialist that extracts themes from product reviews. Only Return valid JSON with no markdown or placeholder text."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=6000  # Increased for larger chunks - Groq supports 32k context
-        )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
+        # Try the fast draft model first; escalate to the stronger model when
+        # its output is unusable or leaves too many reviews without themes.
+        # Output cut off at max_tokens would be cut off for the stronger model
+        # too, so that chunk is split in two instead.
+        try:
+            result = await _request_themes(client, GROQ_MODEL_DRAFT, reviews_json, chunk_id)
+            themes_by_id = _match_theme_items(result, groups)
+        except TruncatedResponseError:
+            if len(review_groups) > 1:
+                return await _extract_themes_split(review_groups, chunk_id)
+            themes_by_id = None
+        except Exception as e:
+            print(f"Draft theme extraction failed for chunk {chunk_id}: {e}")
+            themes_by_id = None
         
-        result = json.loads(content)
+        if themes_by_id is None or _needs_escalation(themes_by_id, len(review_data)):
+            print(f"Escalating chunk {chunk_id} from {GROQ_MODEL_DRAFT} to {GROQ_MODEL_Cheap}")
+            try:
+                result = await _request_themes(client, GROQ_MODEL_Cheap, reviews_json, chunk_id)
+            except TruncatedResponseError:
+                if len(review_groups) > 1:
+                    return await _extract_themes_split(review_groups, chunk_id)
+                raise
+            themes_by_id = _match_theme_items(result, groups)
         
         # Convert to ThemeMention objects with actual snippets
         mentions = []
-        review_idx = 0
-        for item in result:
-            review_id = item.get("review_id")
-            themes = item.get("themes", [])
-            
-            # Match with original review
-            review = reviews[review_idx] if review_idx < len(reviews) else None
-            review_idx += 1
-            
-            if not review:
-                continue
-            
-            title = review.review_title or ""
-            full_content = review.review_content or ""
+        for review_id, themes in themes_by_id.items():
+            group = groups[review_id]
+            full_content = group[0].review_content or ""
+            full_content_lower = None  # Lowercased once, only if a fallback snippet is needed
             
             for theme in themes:
                 # Use the snippet provided by LLM if available, otherwise extract from content
@@ -133,34 +276,213 @@ IMPORTANT: Return ONLY valid JSON. No markdown, no explanations."""
                     snippet = llm_snippet
                 else:
                     # Fallback: extract snippet around theme label keywords
-                    snippet = extract_snippet_for_theme(full_content, theme_label)
+                    if full_content_lower is None:
+                        full_content_lower = full_content.lower()
+                    snippet = extract_snippet_for_theme(full_content, full_content_lower, theme_label)
                 
-                mention = ThemeMention(
-                    theme_label=theme_label,
-                    polarity=theme.get("polarity", "love"),
-                    review_id=review_id,
-                    review_title=title,
-                    review_snippet=snippet
-                )
-                mentions.append(mention)
+                polarity = theme.get("polarity", "love")
+                for review in group:
+                    mention = ThemeMention(
+                        theme_label=theme_label,
+                        polarity=polarity,
+                        review_id=review.review_id or review_id,
+                        review_title=review.review_title or "",
+                        review_snippet=snippet
+                    )
+                    mentions.append(mention)
         
         return mentions
     
-    except json.JSONDecodeError as e:
-        content_preview = content[:500] if 'content' in locals() else "N/A"
-        print(f"JSON decode error in chunk {chunk_id}: {e}")
-        print(f"Response content: {content_preview}")
-        return []
     except Exception as e:
         print(f"Error extracting themes from chunk {chunk_id}: {e}")
         return []
 
 
-def extract_snippet_for_theme(content: str, theme_label: str, snippet_length: int = 200) -> str:
+async def _extract_themes_split(review_groups: List[List[ReviewRow]], chunk_id: int) -> List[ThemeMention]:
+    """Extract themes for a chunk as two halves after its response was truncated."""
+    middle = len(review_groups) // 2
+    print(f"Theme output truncated for chunk {chunk_id}; retrying as {middle} + {len(review_groups) - middle} reviews")
+    first = await extract_themes_from_chunk(review_groups[:middle], chunk_id)
+    second = await extract_themes_from_chunk(review_groups[middle:], chunk_id)
+    return first + second
+
+
+async def _request_themes(client: AsyncGroq, model: str, reviews_json: str, chunk_id: int) -> List[Dict]:
+    """Request themes for a chunk from one model and parse the JSON response.
+    
+    Rate-limited requests are retried with exponential backoff.
+    
+    Raises:
+        ValueError: If the response is not a JSON array of objects
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            return await _llm_call_cached(
+                client,
+                model=model,
+                messages=[
+                    {"role": "system", "content": THEME_EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": reviews_json}
+                ],
+                temperature=0.1,
+                max_tokens=THEME_MAX_OUTPUT_TOKENS,
+                parse=lambda content: _parse_themes(content, model, chunk_id)
+            )
+        except RateLimitError:
+            if attempt == RATE_LIMIT_RETRIES:
+                raise
+            await asyncio.sleep(RATE_LIMIT_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def _parse_themes(content: str, model: str, chunk_id: int) -> List[Dict]:
+    """Parse a theme extraction response into its list of per-review items.
+    
+    Raises:
+        ValueError: If the response is not a JSON array of objects
+    """
+    content = strip_code_fences(content)
+    try:
+        result = orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        print(f"JSON decode error in chunk {chunk_id} ({model}): {e}")
+        print(f"Response content: {content[:500]}")
+        raise
+    
+    if not isinstance(result, list) or not all(isinstance(item, dict) for item in result):
+        raise ValueError(f"Unexpected theme response structure from {model}")
+    return result
+
+
+def _match_theme_items(result: List[Dict], sent_ids: Dict[str, List[ReviewRow]]) -> Dict[str, List[Dict]]:
+    """Map each sent review id to the themes the model returned for it.
+    
+    Items are matched on their "review_id" rather than their position, so
+    dropped or reordered items cannot shift themes onto the wrong review.
+    Unknown ids are ignored and the first item for a repeated id wins.
+    """
+    themes_by_id: Dict[str, List[Dict]] = {}
+    for item in result:
+        review_id = item.get("review_id")
+        if review_id is None:
+            continue
+        review_id = str(review_id)
+        if review_id in sent_ids and review_id not in themes_by_id:
+            themes_by_id[review_id] = item.get("themes") or []
+    return themes_by_id
+
+
+def _needs_escalation(themes_by_id: Dict[str, List[Dict]], sent_reviews: int) -> bool:
+    """Check whether a draft response leaves too many sent reviews without themes."""
+    themed = sum(1 for themes in themes_by_id.values() if themes)
+    return sent_reviews - themed > sent_reviews * ESCALATION_MISSING_THEMES_RATIO
+
+
+def estimate_review_tokens(review: ReviewRow) -> int:
+    """Estimate the prompt tokens a review adds to a theme extraction request.
+    
+    Counts the same truncated title/content that is sent to the LLM, plus a
+    small allowance for the JSON keys, id and rating.
+    """
+    chars = len((review.review_title or "")[:100]) + len((review.review_content or "")[:800])
+    return chars // CHARS_PER_TOKEN + 10
+
+
+def auto_chunk_size(review_groups: List[List[ReviewRow]]) -> int:
+    """Pick the maximum reviews per chunk from the average review length.
+    
+    Short reviews produce short responses, so more of them fit in one
+    request; long reviews get smaller chunks so the response is not cut off.
+    
+    Args:
+        review_groups: Groups from group_duplicate_reviews(); the first
+            CHUNK_SIZE_SAMPLE representatives are sampled
+        
+    Returns:
+        Reviews per chunk, between MIN_CHUNK_REVIEWS and MAX_CHUNK_REVIEWS
+    """
+    sample = review_groups[:CHUNK_SIZE_SAMPLE]
+    if not sample:
+        return MAX_CHUNK_REVIEWS
+    avg_tokens = sum(estimate_review_tokens(group[0]) for group in sample) / len(sample)
+    output_per_review = OUTPUT_TOKENS_PER_REVIEW + avg_tokens * OUTPUT_TOKENS_PER_INPUT_TOKEN
+    output_budget = THEME_MAX_OUTPUT_TOKENS * THEME_OUTPUT_TARGET_RATIO
+    return max(MIN_CHUNK_REVIEWS, min(MAX_CHUNK_REVIEWS, int(output_budget // output_per_review)))
+
+
+def chunk_reviews(
+    review_groups: List[List[ReviewRow]],
+    max_reviews: int,
+    token_budget: int = CHUNK_TOKEN_BUDGET
+) -> List[List[List[ReviewRow]]]:
+    """Greedily pack duplicate-review groups into chunks bounded by estimated tokens.
+    
+    Only each group's representative is sent to the LLM, so it alone counts
+    towards the chunk's size and token estimate.
+    
+    Args:
+        review_groups: Groups from group_duplicate_reviews(), in order
+        max_reviews: Maximum groups per chunk (bounds the size of the response)
+        token_budget: Maximum estimated prompt tokens per chunk
+        
+    Returns:
+        List of chunks, preserving group order
+    """
+    chunks = []
+    current: List[List[ReviewRow]] = []
+    current_tokens = 0
+    for group in review_groups:
+        tokens = estimate_review_tokens(group[0])
+        if current and (len(current) >= max_reviews or current_tokens + tokens > token_budget):
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(group)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def group_duplicate_reviews(reviews: List[ReviewRow]) -> List[List[ReviewRow]]:
+    """Group reviews whose content is identical after normalization.
+    
+    Content is compared on the same 800-char prefix that is sent to the LLM,
+    lowercased with punctuation and extra whitespace removed.
+    
+    Returns:
+        Groups in first-seen order; the first review in each group is the
+        longest one and is used as the group's representative
+    """
+    groups: Dict[str, List[ReviewRow]] = {}
+    for review in reviews:
+        key = _normalize_text((review.review_content or "")[:800])
+        groups.setdefault(key, []).append(review)
+    
+    for group in groups.values():
+        group.sort(key=lambda r: len(r.review_content or ""), reverse=True)
+    return list(groups.values())
+
+
+@lru_cache(maxsize=1024)
+def _keyword_pattern(theme_label: str) -> Optional[re.Pattern]:
+    """Compile one alternation matching any keyword of a theme label."""
+    keywords = theme_label.lower().split()
+    if not keywords:
+        return None
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
+def extract_snippet_for_theme(
+    content: str,
+    content_lower: str,
+    theme_label: str,
+    snippet_length: int = 200
+) -> str:
     """Extract relevant snippet from content that mentions the theme.
     
     Args:
         content: Full review content
+        content_lower: content.lower(), computed once by the caller per review
         theme_label: Theme label to search for
         snippet_length: Desired snippet length
         
@@ -170,16 +492,10 @@ def extract_snippet_for_theme(content: str, theme_label: str, snippet_length: in
     if not content or not theme_label:
         return (content or "")[:snippet_length]
     
-    # Split theme label into keywords
-    keywords = theme_label.lower().split()
-    content_lower = content.lower()
-    
-    # Find first occurrence of any keyword
-    best_pos = len(content)
-    for keyword in keywords:
-        pos = content_lower.find(keyword)
-        if pos != -1 and pos < best_pos:
-            best_pos = pos
+    # Find first occurrence of any keyword in a single scan
+    pattern = _keyword_pattern(theme_label)
+    match = pattern.search(content_lower) if pattern else None
+    best_pos = match.start() if match else len(content)
     
     # Extract snippet centered around the match
     if best_pos < len(content):
@@ -204,12 +520,17 @@ def extract_snippet_for_theme(content: str, theme_label: str, snippet_length: in
     return content[:snippet_length]
 
 
+def _normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    normalized = PUNCTUATION_PATTERN.sub('', text.lower().strip())
+    return WHITESPACE_PATTERN.sub(' ', normalized)
+
+
+@lru_cache(maxsize=1024)
 def normalize_theme_label(label: str) -> str:
     """Normalize theme labels for aggregation."""
-    # Lowercase, strip punctuation, normalize whitespace
-    normalized = re.sub(r'[^\w\s]', '', label.lower().strip())
-    normalized = re.sub(r'\s+', ' ', normalized)
-    return normalized
+    # Labels repeat heavily across mentions, so results are memoized
+    return _normalize_text(label)
 
 
 def aggregate_themes(mentions: List[ThemeMention], top_n: int = 3) -> Dict[str, List[ThemeSummary]]:
@@ -218,18 +539,17 @@ def aggregate_themes(mentions: List[ThemeMention], top_n: int = 3) -> Dict[str,
     Returns:
         Dict with "love" and "improve" keys, each containing top_n ThemeSummary objects
     """
-    # Group by normalized label and polarity
-    theme_groups: Dict[str, Dict[str, List[ThemeMention]]] = {}
+    # Group by normalized label and polarity in a single pass
+    theme_groups: Dict[str, Dict[str, List[ThemeMention]]] = defaultdict(
+        lambda: {"love": [], "improve": []}
+    )
     
     for mention in mentions:
         normalized_label = normalize_theme_label(mention.theme_label)
         if not normalized_label:
             continue
         
-        if normalized_label not in theme_groups:
-            theme_groups[normalized_label] = {"love": [], "improve": []}
-        
-        polarity = mention.polarity if mention.polarity in ["love", "improve"] else "love"
+        polarity = mention.polarity if mention.polarity in ("love", "improve") else "love"
         theme_groups[normalized_label][polarity].append(mention)
     
     # Create summaries for each polarity
@@ -267,17 +587,14 @@ def aggregate_themes(mentions: List[ThemeMention], top_n: int = 3) -> Dict[str,
             else:
                 improve_themes.append(theme_summary)
     
-    # Sort by count and return top_n
-    love_themes.sort(key=lambda x: x.count, reverse=True)
-    improve_themes.sort(key=lambda x: x.count, reverse=True)
-    
+    # Select the top_n by count without sorting every theme
     return {
-        "love": love_themes[:top_n],
-        "improve": improve_themes[:top_n]
+        "love": heapq.nlargest(top_n, love_themes, key=lambda x: x.count),
+        "improve": heapq.nlargest(top_n, improve_themes, key=lambda x: x.count)
     }
 
 
-def generate_executive_brief(
+async def generate_executive_brief(
     total_reviews: int,
     rating_distribution: Dict[str, int],
     sentiment_summary: str,
@@ -308,34 +625,18 @@ def generate_executive_brief(
         }
     }
     
-    prompt = f"""Based on the following product review analysis, write a concise executive brief (3-4 paragraphs) that includes:
-
-1. Overall sentiment summary
-2. Top 3 most loved aspects (with context)
-3. Top 3 areas needing improvement (with context)
-4. Recent trends (comparison of last {trends.window_days} days vs overall)
-5. Actionable recommendations for:
-   - Product improvements
-   - Content/marketing ideas
-
-Analysis Data:
-{json.dumps(stats_summary, separators=(',', ':'))}
-
-Write in a professional, actionable tone. Be specific and data-driven.
-Keep in mind that this will be directly input into a webpage, so ensure regular text formatting and avoid markdown."""
-    
     try:
-        response = client.chat.completions.create(
+        brief = await _llm_call_cached(
+            client,
             model=GROQ_MODEL,
             messages=[
-                {"role": "system", "content": "You are a business analyst writing executive summaries based on product review data."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": EXECUTIVE_BRIEF_SYSTEM_PROMPT},
+                {"role": "user", "content": orjson.dumps(stats_summary).decode()}
             ],
             temperature=0.5,
-            max_tokens=2000  # Groq supports larger outputs
+            max_tokens=2000,  # Groq supports larger outputs
+            parse=strip_code_fences
         )
-        
-        brief = response.choices[0].message.content.strip()
         return brief
     
     except Exception as e:
@@ -4,23 +4,22 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import db
-from app.routes import router
+from app.routes import get_llm_max_concurrency, router
 
 # Load environment variables from .env file
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(env_path)
 
-# Initialize database
-db.init_db()
-
 # Create FastAPI app
 app = FastAPI(
     title="UGC Review Mining Agent API",
     description="API for analyzing product reviews from CSV files",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -37,6 +36,23 @@ app.add_middleware(
 app.include_router(router, prefix="/api", tags=["api"])
 
 
+@app.on_event("startup")
+async def startup():
+    """Migrate the schema and expire old LLM cache entries when a worker starts."""
+    db.init_db()
+    conn = db.get_db()
+    db.prune_llm_cache(conn)
+    conn.commit()
+    # Validate LLM_MAX_CONCURRENCY now so a bad value is reported at boot
+    get_llm_max_concurrency()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close pooled database connections when a worker stops."""
+    db.close_all()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -1,4 +1,5 @@
 """Data models and schemas."""
+from dataclasses import dataclass
 from datetime import date, datetime
 from typing import Dict, List, Optional
 
@@ -17,8 +18,25 @@ class ReviewInput(BaseModel):
     product_url: Optional[str] = None
 
 
-class ThemeMention(BaseModel):
-    """Theme mention extracted from a review."""
+@dataclass(slots=True)
+class ReviewRow:
+    """Parsed review used internally on the parsing and analysis hot path.
+    
+    Mirrors ReviewInput without Pydantic validation or a per-instance __dict__.
+    """
+    rating: int
+    review_id: Optional[str] = None
+    reviewer_name: Optional[str] = None
+    review_title: Optional[str] = None
+    review_content: Optional[str] = None
+    review_date: Optional[date] = None
+    review_badge: Optional[str] = None
+    product_url: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ThemeMention:
+    """Theme mention extracted from a review (internal only, never serialized)."""
     theme_label: str
     polarity: str  # "love" or "improve"
     review_id: Optional[str] = None
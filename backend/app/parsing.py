@@ -1,11 +1,35 @@
 """CSV parsing and data normalization."""
+import codecs
 import csv
 import io
 import re
 from datetime import date, datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, Optional
 
-from app.models import ReviewInput
+from app.models import ReviewRow
+
+# Encodings to try, in order, when decoding uploaded CSVs
+ENCODINGS = ("utf-8", "latin-1", "iso-8859-1", "cp1252")
+
+# Precompiled patterns used on every row
+RATING_PATTERN = re.compile(r'(\d+)')
+DATE_PATTERN = re.compile(r'on\s+([A-Za-z]+\s+\d+,\s+\d+)')
+
+# Formats for the date part of Amazon-style "Reviewed in ... on ..." strings
+DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y")
+
+# Normalized column names that can supply each review field, in priority order
+FIELD_COLUMNS = {
+    "review_id": ("review_id",),
+    "reviewer_name": ("reviewer_name", "reviewer"),
+    "review_title": ("review_title", "title"),
+    "review_content": ("review_content", "content"),
+    "review_rating": ("review_rating", "rating"),
+    "review_date": ("review_date", "date"),
+    "review_badge": ("review_badge",),
+    "product_url": ("product_url",),
+}
 
 
 def parse_rating(rating_str: Optional[str]) -> int:
@@ -20,7 +44,7 @@ def parse_rating(rating_str: Optional[str]) -> int:
         return 3  # Default neutral
     
     # Extract first number
-    match = re.search(r'(\d+)', str(rating_str))
+    match = RATING_PATTERN.search(str(rating_str))
     if match:
         rating = int(match.group(1))
         return max(1, min(5, rating))  # Clamp to 1-5
@@ -31,26 +55,35 @@ def parse_date(date_str: Optional[str]) -> Optional[date]:
     """Parse date string to date object.
     
     Examples:
+        "2026-01-12" -> date(2026, 1, 12)
         "Reviewed in the United States on January 12, 2026" -> date(2026, 1, 12)
     """
     if not date_str:
         return None
     
+    date_str = str(date_str)
+    
+    # Fast path for ISO dates (optionally followed by a time)
+    if len(date_str) >= 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            return date.fromisoformat(date_str[:10])
+        except ValueError:
+            pass
+    
     # Extract date part after "on"
-    match = re.search(r'on\s+([A-Za-z]+\s+\d+,\s+\d+)', str(date_str))
+    match = DATE_PATTERN.search(date_str)
     if match:
         date_part = match.group(1)
-        try:
-            return datetime.strptime(date_part, "%B %d, %Y").date()
-        except ValueError:
+        for date_format in DATE_FORMATS:
             try:
-                return datetime.strptime(date_part, "%b %d, %Y").date()
+                return datetime.strptime(date_part, date_format).date()
             except ValueError:
-                pass
+                continue
     
     return None
 
 
+@lru_cache(maxsize=1024)
 def normalize_column_name(col_name: str) -> str:
     """Normalize column names for flexible matching."""
     col_lower = col_name.lower().strip()
@@ -79,72 +112,130 @@ def clean_text(text: Optional[str], max_length: int = 5000) -> Optional[str]:
     return text
 
 
-def parse_csv(file_content: bytes, max_rows: int = 10000) -> List[ReviewInput]:
-    """Parse CSV file content into ReviewInput objects.
+def detect_encoding(stream: BinaryIO, chunk_size: int = 65536) -> str:
+    """Find the first supported encoding that decodes the whole stream.
+    
+    Decodes incrementally so only one chunk of text exists at a time, and
+    rewinds the stream to where it started before returning.
+    
+    Raises:
+        ValueError: If no supported encoding can decode the file
+    """
+    start = stream.tell()
+    for encoding in ENCODINGS:
+        stream.seek(start)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            while chunk := stream.read(chunk_size):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+            stream.seek(start)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Could not decode CSV file. Please ensure it's UTF-8 encoded.")
+
+
+def iter_reviews(stream: BinaryIO, max_rows: int = 10000) -> Iterator[ReviewRow]:
+    """Lazily parse a binary CSV stream into ReviewRow objects.
+    
+    The stream is decoded as it is read, so the file is never held in
+    memory as one bytes or str object.
     
     Args:
-        file_content: Raw CSV file bytes
+        stream: Seekable binary file object positioned at the CSV start
         max_rows: Maximum number of rows to process
         
-    Returns:
-        List of ReviewInput objects
+    Yields:
+        ReviewRow objects, one per CSV row
         
     Raises:
-        ValueError: If CSV is malformed or exceeds limits
+        ValueError: If CSV cannot be decoded or exceeds limits
     """
+    encoding = detect_encoding(stream)
+    text_stream = io.TextIOWrapper(stream, encoding=encoding, newline="")
     try:
-        text_content = file_content.decode('utf-8')
-    except UnicodeDecodeError:
-        # Try with common encodings
-        for encoding in ['latin-1', 'iso-8859-1', 'cp1252']:
-            try:
-                text_content = file_content.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        else:
-            raise ValueError("Could not decode CSV file. Please ensure it's UTF-8 encoded.")
+        yield from _read_rows(csv.reader(text_stream), max_rows)
+    finally:
+        # Leave the caller's stream open
+        text_stream.detach()
+
+
+def _read_rows(reader: Iterator[List[str]], max_rows: int) -> Iterator[ReviewRow]:
+    """Map csv.reader rows (header first) onto ReviewRow objects."""
+    header = next(reader, [])
     
-    reader = csv.DictReader(io.StringIO(text_content))
+    # Resolve the source columns for each field once from the header,
+    # rather than building a normalized dict for every row
+    column_index = {normalize_column_name(col): idx for idx, col in enumerate(header)}
+    field_indices = {
+        field: [column_index[name] for name in names if name in column_index]
+        for field, names in FIELD_COLUMNS.items()
+    }
     
-    # Normalize column names
-    normalized_columns = {col: normalize_column_name(col) for col in reader.fieldnames or []}
+    def field_value(row: List[str], field: str) -> Optional[str]:
+        """Return the first non-empty value for a field, with fallbacks."""
+        for idx in field_indices[field]:
+            if idx < len(row) and row[idx]:
+                return row[idx]
+        return None
     
-    reviews = []
     row_count = 0
     
     for row in reader:
+        if not row:
+            continue
         if row_count >= max_rows:
             raise ValueError(f"CSV exceeds maximum row limit of {max_rows}")
         
-        # Map to normalized column names
-        normalized_row = {normalized_columns.get(k, k): v for k, v in row.items()}
-        
-        # Extract fields with fallbacks
-        rating_str = normalized_row.get("review_rating") or normalized_row.get("rating")
-        date_str = normalized_row.get("review_date") or normalized_row.get("date")
-        review_content = normalized_row.get("review_content") or normalized_row.get("content")
-        review_title = normalized_row.get("review_title") or normalized_row.get("title")
-        reviewer_name = normalized_row.get("reviewer_name") or normalized_row.get("reviewer")
+        rating = parse_rating(field_value(row, "review_rating"))
+        review_date = parse_date(field_value(row, "review_date"))
         
-        rating = parse_rating(rating_str)
-        review_date = parse_date(date_str)
-        
-        review = ReviewInput(
-            review_id=normalized_row.get("review_id"),
-            reviewer_name=reviewer_name,
-            review_title=clean_text(review_title, 500),
-            review_content=clean_text(review_content),
+        yield ReviewRow(
+            review_id=field_value(row, "review_id"),
+            reviewer_name=field_value(row, "reviewer_name"),
+            review_title=clean_text(field_value(row, "review_title"), 500),
+            review_content=clean_text(field_value(row, "review_content")),
             rating=rating,
             review_date=review_date,
-            review_badge=normalized_row.get("review_badge"),
-            product_url=normalized_row.get("product_url")
+            review_badge=field_value(row, "review_badge"),
+            product_url=field_value(row, "product_url")
         )
-        
-        reviews.append(review)
         row_count += 1
+
+
+def parse_csv_stream(stream: BinaryIO, max_rows: int = 10000) -> List[ReviewRow]:
+    """Parse a binary CSV stream into ReviewRow objects.
+    
+    Args:
+        stream: Seekable binary file object, e.g. an upload's spooled file
+        max_rows: Maximum number of rows to process
+        
+    Returns:
+        List of ReviewRow objects
+        
+    Raises:
+        ValueError: If CSV is malformed or exceeds limits
+    """
+    reviews = list(iter_reviews(stream, max_rows=max_rows))
     
     if not reviews:
         raise ValueError("CSV file appears to be empty or contains no valid reviews")
     
     return reviews
+
+
+def parse_csv(file_content: bytes, max_rows: int = 10000) -> List[ReviewRow]:
+    """Parse CSV file content into ReviewRow objects.
+    
+    Args:
+        file_content: Raw CSV file bytes
+        max_rows: Maximum number of rows to process
+        
+    Returns:
+        List of ReviewRow objects
+        
+    Raises:
+        ValueError: If CSV is malformed or exceeds limits
+    """
+    return parse_csv_stream(io.BytesIO(file_content), max_rows=max_rows)
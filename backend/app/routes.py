@@ -1,25 +1,99 @@
 """API routes."""
-import json
+import asyncio
+import os
 import time
 import uuid
+from collections import OrderedDict
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile, status
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 
 from app import db
-from app.llm import aggregate_themes, extract_themes_from_chunk, generate_executive_brief
-from app.models import AnalysisResults, AnalyzeResponse, JobStatus, RatingDistribution, ThemeSummary, TrendWindow
-from app.parsing import parse_csv
+from app.llm import aggregate_themes, auto_chunk_size, chunk_reviews, extract_themes_from_chunk, generate_executive_brief, group_duplicate_reviews
+from app.models import AnalysisResults, AnalyzeResponse, JobStatus, RatingDistribution, ReviewRow, ThemeSummary, TrendWindow
+from app.parsing import parse_csv_stream
 
 router = APIRouter()
 
 # Constants
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_ROWS = 10000
-CHUNK_SIZE = 35  # Reviews per LLM batch (optimized for Groq's 32k context)
+MAX_CONCURRENT_CHUNKS = 8  # Default in-flight LLM requests per process; override with LLM_MAX_CONCURRENCY
+RESULTS_CACHE_SIZE = 128  # Completed jobs kept parsed in memory for polling
+REVIEW_FETCH_BATCH_SIZE = 1000  # Stored reviews read per fetchmany() on rerun
+
+# Process-wide bound on in-flight LLM requests, shared by every running
+# analysis: (event loop it was created on, semaphore)
+_llm_semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+# Executive brief stored for jobs that have no reviews to analyze
+NO_REVIEWS_BRIEF = "No reviews were available to analyze."
+
+# Rendered results of recently polled jobs: job_id -> (jobs.updated_at, JSON
+# body). Entries are only served while the job's updated_at is unchanged.
+_results_cache: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+
+# Columns written for each stored review, in db.bulk_insert() row order
+REVIEW_COLUMNS = (
+    "job_id", "review_id", "reviewer_name", "review_title", "review_content",
+    "rating", "review_date", "review_badge", "product_url"
+)
+
+# Sample CSVs shipped with the repo, resolved once at import
+SAMPLES_DIR = (Path(__file__).parent.parent.parent / "Sample_Review_Files").resolve()
+
+# Cached /samples listing: (SAMPLES_DIR mtime, samples)
+_samples_listing: Optional[Tuple[int, List[dict]]] = None
+
+# All route SQL, defined once so every call reuses the same prepared
+# statement from the connection's statement cache
+SQL_INSERT_JOB = "INSERT INTO jobs (id, status, total_reviews, filename) VALUES (?, ?, ?, ?)"
+SQL_SET_JOB_STATUS = "UPDATE jobs SET status = ? WHERE id = ?"
+SQL_COMPLETE_JOB = "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?"
+SQL_JOB_EXISTS = "SELECT id FROM jobs WHERE id = ?"
+SQL_SELECT_JOB_FILENAME = "SELECT filename FROM jobs WHERE id = ?"
+SQL_SELECT_JOB_RESULTS = """SELECT j.status, j.updated_at, j.filename, r.results_json
+    FROM jobs j LEFT JOIN job_results r ON r.job_id = j.id
+    WHERE j.id = ?"""
+SQL_SELECT_JOB_REVIEWS = """SELECT review_id, reviewer_name, review_title, review_content,
+    rating, review_date, review_badge, product_url
+    FROM reviews WHERE job_id = ?"""
+SQL_UPSERT_JOB_RESULT = """INSERT OR REPLACE INTO job_results (job_id, results_json, updated_at)
+    VALUES (?, ?, ?)"""
+
+
+@lru_cache(maxsize=1)
+def get_llm_max_concurrency() -> int:
+    """Read LLM_MAX_CONCURRENCY once, falling back to the default if invalid.
+    
+    Read lazily rather than at import, since main.py loads .env after
+    importing the routes.
+    """
+    raw = os.getenv("LLM_MAX_CONCURRENCY")
+    if raw is None:
+        return MAX_CONCURRENT_CHUNKS
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        print(f"Invalid LLM_MAX_CONCURRENCY {raw!r}; using {MAX_CONCURRENT_CHUNKS}")
+        return MAX_CONCURRENT_CHUNKS
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent LLM requests across all jobs.
+    
+    Created lazily with get_llm_max_concurrency(), and only recreated if the
+    running event loop changes (e.g. between test clients).
+    """
+    global _llm_semaphore
+    loop = asyncio.get_running_loop()
+    if _llm_semaphore is None or _llm_semaphore[0] is not loop:
+        _llm_semaphore = (loop, asyncio.Semaphore(get_llm_max_concurrency()))
+    return _llm_semaphore[1]
 
 
 @router.get("/health")
@@ -29,52 +103,49 @@ async def health_check():
 
 
 @router.post("/analyze", response_model=AnalyzeResponse, status_code=status.HTTP_201_CREATED)
-async def analyze_reviews(file: UploadFile = File(...)):
+async def analyze_reviews(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """Upload and analyze CSV file of reviews.
     
-    Returns job_id for polling results.
+    Analysis runs as a background task; returns job_id for polling results.
     """
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > MAX_FILE_SIZE:
+    # Check file size from the spooled upload without reading it into memory
+    upload = file.file
+    upload.seek(0, os.SEEK_END)
+    file_size = upload.tell()
+    upload.seek(0)
+    if file_size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File size exceeds maximum of {MAX_FILE_SIZE / (1024*1024):.1f}MB"
         )
     
+    # Parse CSV before touching the database, so empty or invalid uploads
+    # are rejected without leaving a job behind
+    try:
+        reviews = parse_csv_stream(upload, max_rows=MAX_ROWS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Processing error: {str(e)}")
+    
     # Generate job ID
     job_id = str(uuid.uuid4())
     
     # Get filename
     filename = file.filename or "uploaded_file.csv"
     
-    # Create job record
     conn = db.get_db()
     cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO jobs (id, status, total_reviews, filename) VALUES (?, ?, ?, ?)",
-        (job_id, "pending", 0, filename)
-    )
-    conn.commit()
-    
     try:
-        # Parse CSV
-        reviews = parse_csv(file_content, max_rows=MAX_ROWS)
-        
-        # Update job status
-        cursor.execute(
-            "UPDATE jobs SET status = ?, total_reviews = ? WHERE id = ?",
-            ("processing", len(reviews), job_id)
-        )
-        conn.commit()
-        
-        # Store reviews in database
-        for review in reviews:
-            cursor.execute(
-                """INSERT INTO reviews 
-                   (job_id, review_id, reviewer_name, review_title, review_content, 
-                    rating, review_date, review_badge, product_url)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        # Create the job and store its reviews in one write transaction,
+        # taking the write lock up front (multi-row INSERTs for the reviews)
+        conn.execute("BEGIN IMMEDIATE")
+        cursor.execute(SQL_INSERT_JOB, (job_id, "processing", len(reviews), filename))
+        db.bulk_insert(
+            conn,
+            "reviews",
+            REVIEW_COLUMNS,
+            (
                 (
                     job_id,
                     review.review_id,
@@ -86,48 +157,53 @@ async def analyze_reviews(file: UploadFile = File(...)):
                     review.review_badge,
                     review.product_url
                 )
+                for review in reviews
             )
+        )
         conn.commit()
         
-        # Run analysis asynchronously (in production, use background tasks)
-        # For MVP, run synchronously but return job_id immediately
-        # In a real app, use FastAPI BackgroundTasks
-        await process_analysis(job_id, reviews)
+        # Run analysis after the response is sent; clients poll /jobs/{job_id}
+        background_tasks.add_task(process_analysis, job_id, reviews)
         
         return AnalyzeResponse(job_id=job_id, status="processing")
     
-    except ValueError as e:
-        # Update job status to error
-        cursor.execute("UPDATE jobs SET status = ? WHERE id = ?", ("error", job_id))
-        conn.commit()
-        conn.close()
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        cursor.execute("UPDATE jobs SET status = ? WHERE id = ?", ("error", job_id))
-        conn.commit()
-        conn.close()
+        # Discard the job along with any partial inserts
+        conn.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Processing error: {str(e)}")
-    finally:
-        conn.close()
 
 
 async def process_analysis(job_id: str, reviews: List):
-    """Process analysis for a job."""
+    """Process analysis for a job.
+    
+    Runs as a background task, so failures are recorded on the job
+    (status "error") instead of being raised.
+    """
     start_time = time.time()
+    conn = db.get_db()
     try:
-        # Calculate rating distribution
-        rating_dist = RatingDistribution()
+        # Tally the rating distribution and the 60-day trend window in one
+        # pass. Ratings are clamped to 1-5 when parsed, so they index directly.
+        now = date.today()
+        sixty_days_ago = now - timedelta(days=60)
+        rating_counts = [0] * 6
+        recent_counts = [0] * 6
         for review in reviews:
-            if review.rating == 1:
-                rating_dist.rating_1 += 1
-            elif review.rating == 2:
-                rating_dist.rating_2 += 1
-            elif review.rating == 3:
-                rating_dist.rating_3 += 1
-            elif review.rating == 4:
-                rating_dist.rating_4 += 1
-            elif review.rating == 5:
-                rating_dist.rating_5 += 1
+            rating = review.rating
+            rating_counts[rating] += 1
+            review_date = review.review_date
+            if review_date and review_date >= sixty_days_ago:
+                recent_counts[rating] += 1
+        
+        # Internal results are built with model_construct: every value is
+        # computed here, so Pydantic validation would only re-check our own ints
+        rating_dist = RatingDistribution.model_construct(
+            rating_1=rating_counts[1],
+            rating_2=rating_counts[2],
+            rating_3=rating_counts[3],
+            rating_4=rating_counts[4],
+            rating_5=rating_counts[5]
+        )
         
         # Calculate sentiment
         positive_count = rating_dist.rating_4 + rating_dist.rating_5
@@ -135,7 +211,7 @@ async def process_analysis(job_id: str, reviews: List):
         neutral_count = rating_dist.rating_3
         total = len(reviews)
         
-        positive_pct = (positive_count / total * 100) if total > 0 else 0
+        positive_pct = (positive_count / total * 100) if total > 0 else 0.0
         
         if positive_pct >= 60:
             sentiment = "positive"
@@ -144,13 +220,25 @@ async def process_analysis(job_id: str, reviews: List):
         else:
             sentiment = "negative"
         
-        # Extract themes in chunks
-        all_mentions = []
-        for i in range(0, len(reviews), CHUNK_SIZE):
-            chunk = reviews[i:i + CHUNK_SIZE]
-            chunk_id = i // CHUNK_SIZE
-            mentions = extract_themes_from_chunk(chunk, chunk_id)
-            all_mentions.extend(mentions)
+        # Extract themes in chunks, running the LLM requests concurrently
+        # (bounded process-wide, across overlapping jobs, to stay under the
+        # Groq account's rate limits). Duplicate reviews are grouped across
+        # the whole file first, so each distinct review is sent once no
+        # matter which chunk its copies land in.
+        semaphore = get_llm_semaphore()
+
+        review_groups = group_duplicate_reviews(reviews)
+        max_reviews = auto_chunk_size(review_groups)
+
+        async def extract_chunk(chunk: List, chunk_id: int):
+            async with semaphore:
+                return await extract_themes_from_chunk(chunk, chunk_id)
+
+        chunk_results = await asyncio.gather(*[
+            extract_chunk(chunk, chunk_id)
+            for chunk_id, chunk in enumerate(chunk_reviews(review_groups, max_reviews=max_reviews))
+        ])
+        all_mentions = [mention for mentions in chunk_results for mention in mentions]
         
         # Aggregate themes
         theme_aggregates = aggregate_themes(all_mentions, top_n=3)
@@ -158,46 +246,47 @@ async def process_analysis(job_id: str, reviews: List):
         top_improve = theme_aggregates["improve"]
         
         # Calculate trends (last 60 days vs overall)
-        now = date.today()
-        sixty_days_ago = now - timedelta(days=60)
-        
-        recent_reviews = [r for r in reviews if r.review_date and r.review_date >= sixty_days_ago]
-        recent_positive = sum(1 for r in recent_reviews if r.rating >= 4)
-        recent_negative = sum(1 for r in recent_reviews if r.rating <= 2)
-        recent_neutral = len(recent_reviews) - recent_positive - recent_negative
+        recent_positive = recent_counts[4] + recent_counts[5]
+        recent_negative = recent_counts[1] + recent_counts[2]
+        recent_neutral = recent_counts[3]
         
-        trends = TrendWindow(
+        trends = TrendWindow.model_construct(
             window_days=60,
-            total_reviews=len(recent_reviews),
+            total_reviews=sum(recent_counts),
             positive_count=recent_positive,
             negative_count=recent_negative,
             neutral_count=recent_neutral,
             themes_improve=top_improve
         )
         
-        # Generate executive brief
-        exec_brief = generate_executive_brief(
-            total_reviews=total,
-            rating_distribution=rating_dist.dict(),
-            sentiment_summary=sentiment,
-            top_loved_themes=top_loved,
-            top_improvement_themes=top_improve,
-            trends=trends
-        )
+        # Generate executive brief (chunking already makes no theme requests
+        # for an empty job, so this skips its only remaining LLM call)
+        if total:
+            async with semaphore:
+                exec_brief = await generate_executive_brief(
+                    total_reviews=total,
+                    rating_distribution=rating_dist.model_dump(),
+                    sentiment_summary=sentiment,
+                    top_loved_themes=top_loved,
+                    top_improvement_themes=top_improve,
+                    trends=trends
+                )
+        else:
+            exec_brief = NO_REVIEWS_BRIEF
         
         # Calculate analysis time
         analysis_time = time.time() - start_time
+        # One timestamp for the results and the job record
+        completed_at = datetime.now()
         
         # Get filename from job
-        conn_check = db.get_db()
-        cursor_check = conn_check.cursor()
-        cursor_check.execute("SELECT filename FROM jobs WHERE id = ?", (job_id,))
-        job_row = cursor_check.fetchone()
+        cursor = conn.cursor()
+        cursor.execute(SQL_SELECT_JOB_FILENAME, (job_id,))
+        job_row = cursor.fetchone()
         filename = job_row["filename"] if job_row else None
-        conn_check.close()
         
         # Build results object
-        results = AnalysisResults(
+        results = AnalysisResults.model_construct(
             job_id=job_id,
             total_reviews=total,
             rating_distribution=rating_dist,
@@ -209,31 +298,23 @@ async def process_analysis(job_id: str, reviews: List):
             executive_brief=exec_brief,
             analysis_time_seconds=round(analysis_time, 2),
             filename=filename,
-            created_at=datetime.now(),
-            updated_at=datetime.now()
+            created_at=completed_at,
+            updated_at=completed_at
         )
         
         # Store results
-        conn = db.get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT OR REPLACE INTO job_results (job_id, results_json, updated_at)
-               VALUES (?, ?, ?)""",
-            (job_id, results.model_dump_json(), datetime.now())
-        )
-        cursor.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", ("completed", datetime.now(), job_id))
+        cursor.execute(SQL_UPSERT_JOB_RESULT, (job_id, results.model_dump_json(), completed_at))
+        cursor.execute(SQL_COMPLETE_JOB, ("completed", completed_at, job_id))
         conn.commit()
-        conn.close()
+        _results_cache.pop(job_id, None)
     
     except Exception as e:
         # Mark job as error
-        conn = db.get_db()
+        conn.rollback()
         cursor = conn.cursor()
-        cursor.execute("UPDATE jobs SET status = ? WHERE id = ?", ("error", job_id))
+        cursor.execute(SQL_SET_JOB_STATUS, ("error", job_id))
         conn.commit()
-        conn.close()
         print(f"Error processing job {job_id}: {e}")
-        raise
 
 
 @router.get("/jobs/{job_id}", response_model=AnalysisResults)
@@ -242,101 +323,92 @@ async def get_job_results(job_id: str):
     conn = db.get_db()
     cursor = conn.cursor()
     
-    # Check job status
-    cursor.execute("SELECT status FROM jobs WHERE id = ?", (job_id,))
+    # Job status, filename and stored results in one round trip
+    cursor.execute(SQL_SELECT_JOB_RESULTS, (job_id,))
     job_row = cursor.fetchone()
     if not job_row:
-        conn.close()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
     job_status = job_row["status"]
+    updated_at = job_row["updated_at"]
     if job_status == "pending" or job_status == "processing":
-        conn.close()
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_202_ACCEPTED,
             content={"job_id": job_id, "status": job_status}
         )
     
     if job_status == "error":
-        conn.close()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Job processing failed")
     
-    # Get results and filename from job
-    cursor.execute("SELECT results_json FROM job_results WHERE job_id = ?", (job_id,))
-    result_row = cursor.fetchone()
+    # Serve repeated polls from the in-process cache while the job is unchanged
+    cached = _results_cache.get(job_id)
+    if cached and cached[0] == updated_at:
+        _results_cache.move_to_end(job_id)
+        return Response(content=cached[1], media_type="application/json")
     
-    if not result_row:
-        conn.close()
+    if job_row["results_json"] is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Results not found")
     
-    # Get filename from job if not in results
-    cursor.execute("SELECT filename FROM jobs WHERE id = ?", (job_id,))
-    job_row = cursor.fetchone()
-    filename = job_row["filename"] if job_row else None
-    conn.close()
-    
-    results_dict = json.loads(result_row["results_json"])
+    # Validate straight from the stored JSON (parsed in pydantic-core, with
+    # no intermediate dict)
+    results = AnalysisResults.model_validate_json(job_row["results_json"])
     # Ensure filename is included
-    if filename and "filename" not in results_dict:
-        results_dict["filename"] = filename
+    if results.filename is None:
+        results.filename = job_row["filename"]
     
-    return AnalysisResults(**results_dict)
+    # Render once and return the bytes directly, so FastAPI does not
+    # re-validate and re-encode the model on this or later polls
+    body = results.model_dump_json().encode()
+    _results_cache[job_id] = (updated_at, body)
+    _results_cache.move_to_end(job_id)
+    if len(_results_cache) > RESULTS_CACHE_SIZE:
+        _results_cache.popitem(last=False)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/jobs/{job_id}/rerun")
-async def rerun_analysis(job_id: str):
+async def rerun_analysis(job_id: str, background_tasks: BackgroundTasks):
     """Re-run analysis for an existing job."""
     conn = db.get_db()
     cursor = conn.cursor()
     
     # Check job exists
-    cursor.execute("SELECT id FROM jobs WHERE id = ?", (job_id,))
+    cursor.execute(SQL_JOB_EXISTS, (job_id,))
     if not cursor.fetchone():
-        conn.close()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
     # Get stored reviews
-    cursor.execute(
-        """SELECT review_id, reviewer_name, review_title, review_content, 
-           rating, review_date, review_badge, product_url
-           FROM reviews WHERE job_id = ?""",
-        (job_id,)
-    )
-    rows = cursor.fetchall()
-    conn.close()
-    
-    if not rows:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No reviews found for this job")
+    cursor.execute(SQL_SELECT_JOB_REVIEWS, (job_id,))
     
-    # Convert rows back to ReviewInput objects
-    from app.models import ReviewInput
+    # Rebuild ReviewRow objects straight from the stored rows (dates are
+    # stored as ISO strings, so no Pydantic validation is needed), reading
+    # in batches rather than materializing every sqlite3.Row at once
+    cursor.arraysize = REVIEW_FETCH_BATCH_SIZE
     reviews = []
-    for row in rows:
-        review_date = None
-        if row["review_date"]:
-            review_date = datetime.fromisoformat(row["review_date"]).date()
-        
-        review = ReviewInput(
-            review_id=row["review_id"],
-            reviewer_name=row["reviewer_name"],
-            review_title=row["review_title"],
-            review_content=row["review_content"],
-            rating=row["rating"],
-            review_date=review_date,
-            review_badge=row["review_badge"],
-            product_url=row["product_url"]
+    while rows := cursor.fetchmany():
+        reviews.extend(
+            ReviewRow(
+                review_id=row["review_id"],
+                reviewer_name=row["reviewer_name"],
+                review_title=row["review_title"],
+                review_content=row["review_content"],
+                rating=row["rating"],
+                review_date=date.fromisoformat(row["review_date"]) if row["review_date"] else None,
+                review_badge=row["review_badge"],
+                product_url=row["product_url"]
+            )
+            for row in rows
         )
-        reviews.append(review)
+    
+    if not reviews:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No reviews found for this job")
     
     # Update job status
-    conn = db.get_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE jobs SET status = ? WHERE id = ?", ("processing", job_id))
+    cursor.execute(SQL_SET_JOB_STATUS, ("processing", job_id))
     conn.commit()
-    conn.close()
     
-    # Process analysis
-    await process_analysis(job_id, reviews)
+    # Process analysis in the background
+    background_tasks.add_task(process_analysis, job_id, reviews)
     
     return {"job_id": job_id, "status": "processing"}
 
@@ -364,27 +436,33 @@ async def mock_oauth():
 @router.get("/samples")
 async def get_sample_files():
     """Get list of available sample review files."""
-    samples_dir = Path(__file__).parent.parent.parent / "Sample_Review_Files"
-    samples = []
+    global _samples_listing
+    try:
+        mtime = SAMPLES_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {"samples": []}
     
-    if samples_dir.exists():
-        for file_path in samples_dir.glob("*.csv"):
-            samples.append({
+    # Re-scan only when files have been added, removed or renamed
+    if _samples_listing is None or _samples_listing[0] != mtime:
+        samples = [
+            {
                 "filename": file_path.name,
                 "path": f"Sample_Review_Files/{file_path.name}"
-            })
+            }
+            for file_path in SAMPLES_DIR.glob("*.csv")
+        ]
+        _samples_listing = (mtime, samples)
     
-    return {"samples": samples}
+    return {"samples": _samples_listing[1]}
 
 
 @router.get("/samples/{filename}")
 async def get_sample_file(filename: str):
     """Get a sample CSV file."""
-    samples_dir = Path(__file__).parent.parent.parent / "Sample_Review_Files"
-    file_path = samples_dir / filename
+    file_path = (SAMPLES_DIR / filename).resolve()
     
-    # Security check - ensure file is within samples directory
-    if not file_path.exists() or not str(file_path).startswith(str(samples_dir)):
+    # Security check - resolve symlinks and ".." before checking containment
+    if not file_path.is_relative_to(SAMPLES_DIR) or not file_path.is_file():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sample file not found")
     
     return FileResponse(
@@ -70,12 +70,13 @@ export const apiClient = {
   async getJobResults(jobId: string): Promise<AnalysisResults> {
     const response = await fetch(`${API_URL}/api/jobs/${jobId}`);
     
+    // 202 is "ok" to fetch, so check it first: the job is still processing
+    if (response.status === 202) {
+      const data = await response.json();
+      throw new Error(`Job ${data.status}`);
+    }
+    
     if (!response.ok) {
-      if (response.status === 202) {
-        // Still processing
-        const data = await response.json();
-        throw new Error(`Job ${data.status}`);
-      }
       const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
       throw new Error(error.detail || 'Failed to fetch results');
     }